@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 import sys
 import os
+import threading
+import time
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QFileDialog, QMessageBox,
                              QProgressBar, QCheckBox, QGroupBox)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from sonex import MediaOrganizer  # Import your existing script
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+
+# Minimum seconds between progress signals sent to the UI thread
+PROGRESS_INTERVAL = 0.1
 
 class Worker(QThread):
     progress_updated = pyqtSignal(int)
@@ -17,6 +21,16 @@ class Worker(QThread):
         self.organizer = organizer
         self.camera_path = camera_path
         self.destination_path = destination_path
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Ask the worker to stop; files already converting are cleaned up."""
+        self._cancel.set()
+        self.organizer.cancel()
 
     def run(self):
         try:
@@ -24,39 +38,27 @@ class Worker(QThread):
             self.organizer.destination_root = self.destination_path
             self.organizer.save_config()
 
-            files = []
-            for root, _, filenames in os.walk(self.camera_path):
-                for filename in filenames:
-                    files.append(os.path.join(root, filename))
+            files = self.organizer.list_files(self.camera_path)
 
             total_files = len(files)
             processed = 0
+            last_emit = time.monotonic()
 
-            for file_path in files:
-                date_str = self.organizer.get_creation_date(file_path)
-                destination_dir = os.path.join(self.destination_path, date_str)
-                os.makedirs(destination_dir, exist_ok=True)
-
-                if file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.tiff')):
-                    output_filename = os.path.splitext(os.path.basename(file_path))[0] + '.jpg'
-                    output_path = os.path.join(destination_dir, output_filename)
-                    self.organizer.convert_image_to_jpg(file_path, output_path)
-                elif file_path.lower().endswith(('.mts', '.cpi')):
-                    output_filename = os.path.splitext(os.path.basename(file_path))[0] + '.m2ts'
-                    output_path = os.path.join(destination_dir, output_filename)
-                    if file_path.lower().endswith('.cpi'):
-                        video_file = self.organizer.find_associated_video(file_path)
-                        if video_file:
-                            self.organizer.convert_to_m2ts(video_file, output_path)
-                    else:
-                        self.organizer.convert_to_m2ts(file_path, output_path)
-
+            results = self.organizer.process_files(files, self.destination_path, self._cancel)
+            for file_path, _ in results:
+                if self._cancel.is_set():
+                    break
                 processed += 1
-                progress = int((processed / total_files) * 100)
-                self.progress_updated.emit(progress)
-                self.message_updated.emit(f"Processing: {os.path.basename(file_path)}")
-
-            self.finished.emit(True)
+                # Each emit is queued onto the UI thread, so cap them at ~10/s
+                now = time.monotonic()
+                if now - last_emit > PROGRESS_INTERVAL or processed == total_files:
+                    last_emit = now
+                    self.progress_updated.emit(int((processed / total_files) * 100))
+                    self.message_updated.emit(f"Processing: {os.path.basename(file_path)}")
+            # Wait for conversions still running in the pools before reporting back
+            results.close()
+
+            self.finished.emit(not self._cancel.is_set())
         except Exception as e:
             self.message_updated.emit(f"Error: {str(e)}")
             self.finished.emit(False)
@@ -67,7 +69,8 @@ class MediaOrganizerGUI(QMainWindow):
         self.setWindowTitle("Media Organizer")
         self.setGeometry(100, 100, 600, 400)
 
-        self.organizer = MediaOrganizer()
+        # Created after the window is first painted, see load_saved_paths
+        self.organizer = None
 
         self.init_ui()
 
@@ -137,11 +140,16 @@ class MediaOrganizerGUI(QMainWindow):
         layout.addWidget(progress_group)
         layout.addLayout(button_layout)
 
-        # Load saved paths
-        self.load_saved_paths()
+        # Load saved paths once the event loop is running, so the config read
+        # and the sonex import don't delay the first paint
+        QTimer.singleShot(0, self.load_saved_paths)
 
     def load_saved_paths(self):
-        self.organizer.load_config()
+        if self.organizer is None:
+            from sonex import MediaOrganizer  # Import your existing script
+            self.organizer = MediaOrganizer()
+        else:
+            self.organizer.load_config()
         self.camera_path.setText(self.organizer.camera_path)
         self.dest_path.setText(self.organizer.destination_root)
 
@@ -193,7 +201,9 @@ class MediaOrganizerGUI(QMainWindow):
         self.start_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
 
-        if success:
+        if self.worker.cancelled:
+            self.status_label.setText("Operation cancelled")
+        elif success:
             self.status_label.setText("Completed successfully!")
             QMessageBox.information(self, "Success", "Media organization completed successfully!")
         else:
@@ -202,9 +212,9 @@ class MediaOrganizerGUI(QMainWindow):
 
     def cancel_operation(self):
         if hasattr(self, 'worker') and self.worker.isRunning():
-            self.worker.terminate()
-            self.status_label.setText("Operation cancelled")
-            self.start_button.setEnabled(True)
+            # The worker stops cooperatively and reports back via operation_finished
+            self.worker.cancel()
+            self.status_label.setText("Cancelling...")
             self.cancel_button.setEnabled(False)
 
 if __name__ == "__main__":
@@ -5,7 +5,7 @@ VENV_PATH="/usr/local/sonex/myenv"
 INSTALL_DIR="/usr/local/sonex"
 CURRENT_DIR=$(pwd)
 SONEX_SCRIPT="sonex"
-CONFIG_FILE="camera_organizer_config.ini"
+CONFIG_FILE="camera_organizer_config.json"
 
 # Function to log messages
 log() {
@@ -88,18 +88,26 @@ log "Virtual environment activated"
 
 # 8. Check and install dependencies
 log "Checking for required Python packages..."
-PACKAGES=("tqdm" "PyQt5" "ffmpeg-python")
+# Entries are pip_name:import_name, since the two differ for some packages
+PACKAGES=("tqdm:tqdm" "PyQt5:PyQt5" "Pillow:PIL" "av:av" "xxhash:xxhash")
+# Optional packages: sonex.py falls back to ffmpeg when these are missing
+OPTIONAL_PACKAGES=("PyTurboJPEG:turbojpeg")
 
-for pkg in "${PACKAGES[@]}"; do
-    if python3 -c "import $pkg" 2>/dev/null; then
+for entry in "${PACKAGES[@]}" "${OPTIONAL_PACKAGES[@]}"; do
+    pkg="${entry%%:*}"
+    module="${entry#*:}"
+    if python3 -c "import $module" 2>/dev/null; then
         log "$pkg is already installed"
     else
         log "$pkg not found. Installing..."
-        pip install "$pkg" || {
+        if pip install "$pkg"; then
+            log "$pkg installed successfully"
+        elif [[ " ${OPTIONAL_PACKAGES[*]} " == *" $entry "* ]]; then
+            log "Warning: Failed to install optional package $pkg, continuing without it"
+        else
             log "Failed to install $pkg"
             exit 1
-        }
-        log "$pkg installed successfully"
+        fi
     fi
 done
 
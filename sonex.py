@@ -1,131 +1,695 @@
 #!/usr/bin/env python3
+import functools
+import io
+import json
 import os
-import shutil
-import configparser
-from datetime import datetime
-import ffmpeg
+import queue
+import sqlite3
+import subprocess
+import threading
+import time
+import av
+import xxhash
+from PIL import Image
 from tqdm import tqdm
-import glob
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Configuration file path
-CONFIG_FILE = 'camera_organizer_config.ini'
+# libjpeg-turbo is optional; without it images go through ffmpeg
+try:
+    import numpy as np
+    from turbojpeg import TurboJPEG, TJPF_RGB
+except ImportError:
+    TurboJPEG = None
+
+# Configuration file path, and the INI file used by older versions
+CONFIG_FILE = 'camera_organizer_config.json'
+LEGACY_CONFIG_FILE = 'camera_organizer_config.ini'
+
+# Leading ffmpeg arguments: quiet unless something fails, never prompt
+FFMPEG_ARGS = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin', '-y']
+
+# Persistent map from source file fingerprint to the output it was converted to
+DEDUP_DB = os.path.join(os.path.expanduser('~'), '.cache', 'sonex', 'dedup.db')
+
+# Bytes hashed from the start of each source file for its fingerprint
+DEDUP_HEAD_BYTES = 65536
+
+# File extensions handled as images and as AVCHD video
+IMG_EXT = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff'})
+VID_EXT = frozenset({'.mts', '.cpi'})
+
+# Quality used when encoding JPGs with libjpeg-turbo
+JPEG_QUALITY = 92
+
+# Largest number of clips remuxed by a single ffmpeg run
+REMUX_BATCH_SIZE = 64
+
+# Chunk size for byte copies, small enough that a cancel takes effect quickly
+COPY_CHUNK_BYTES = 16 * 1024 * 1024
+
+# FICLONE ioctl request number, shares extents on btrfs/xfs instead of copying
+_FICLONE = 0x40049409
+
+def _scan_entries(root, workers):
+    """Return a DirEntry for every file below root, reading directories on several threads."""
+    pending = queue.Queue()
+    pending.put(root)
+    results = []
+
+    def scan():
+        found = []
+        while True:
+            path = pending.get()
+            if path is None:
+                break
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.put(entry.path)
+                        elif entry.is_file():
+                            found.append(entry)
+            except OSError:
+                # os.walk silently skips unreadable directories too
+                pass
+            finally:
+                pending.task_done()
+        results.append(found)
+
+    threads = [threading.Thread(target=scan, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    # Every directory has been listed once the queue drains, then stop the threads
+    pending.join()
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    return [entry for found in results for entry in found]
+
+@functools.lru_cache(maxsize=4096)
+def _format_date(stamp):
+    """Turn a 'YYYY-MM-DD...' (ffmpeg) or 'YYYY:MM:DD ...' (EXIF) stamp into MM-DD-YYYY.
+
+    Both formats start with a fixed-width date, so slicing replaces strptime.
+    Returns None if the stamp does not start with a date.
+    """
+    parts = stamp[:10].replace(':', '-').split('-')
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    year, month, day = parts
+    return f"{month}-{day}-{year}"
+
+def _is_mpegts(path):
+    """Check for MPEG-TS sync bytes in plain (188-byte) or BDAV (192-byte) packets."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(3 * 192)
+    except OSError:
+        return False
+
+    for offset, packet_size in ((0, 188), (4, 192)):
+        positions = [offset + i * packet_size for i in range(3)]
+        if positions[-1] < len(head) and all(head[p] == 0x47 for p in positions):
+            return True
+    return False
+
+def _fast_copy(src, dst, cancel=None):
+    """Place src at dst by hard link, then reflink, then a plain byte copy.
+
+    The byte copy checks the optional cancel event between chunks and raises
+    InterruptedError once it is set.
+    """
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+
+    try:
+        import fcntl
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+
+    try:
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise InterruptedError(f"copy of {src} cancelled")
+                chunk = s.read(COPY_CHUNK_BYTES)
+                if not chunk:
+                    break
+                d.write(chunk)
+    except OSError:
+        # Don't leave a partial file that a later run would skip as done
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+
+def _video_source(organizer, entry):
+    """Return the clip a video entry refers to, or None if a CPI has no clip."""
+    if os.path.splitext(entry.name)[1].lower() == '.cpi':
+        return organizer.find_associated_video(entry.path)
+    return entry.path
+
+def _video_job(organizer, entry, destination_dir):
+    """Return (source_file, output_path) for a video entry; source_file is None if a CPI has no clip."""
+    stem = os.path.splitext(entry.name)[0]
+    return _video_source(organizer, entry), os.path.join(destination_dir, stem + '.m2ts')
+
+def _needs_remux(organizer, entry):
+    """True if a video entry's clip is not already MPEG-TS and has to go through ffmpeg."""
+    if organizer.cancelled:
+        return False
+    source = _video_source(organizer, entry)
+    return source is not None and not _is_mpegts(source)
+
+def _process_one(organizer, entry, destination_dir):
+    """Convert a single file into its (already created) date folder.
+
+    Returns (file_path, status) where status is True if a file was written,
+    False if it was skipped or failed, and None if it is not a media file.
+    """
+    file_path = entry.path
+    if organizer.cancelled:
+        return file_path, False
+    stem, ext = os.path.splitext(entry.name)
+    ext = ext.lower()
+    if ext in IMG_EXT:
+        # Process image file - convert to JPG
+        source = file_path
+        output_path = os.path.join(destination_dir, stem + '.jpg')
+        convert = organizer.convert_image_to_jpg
+    elif ext in VID_EXT:
+        # Process video file - convert to M2TS
+        source, output_path = _video_job(organizer, entry, destination_dir)
+        if not source:
+            return file_path, None
+        convert = organizer.convert_to_m2ts
+    else:
+        return file_path, None
+
+    # The name check is free, so only fingerprint sources that would be written
+    if not organizer.claim_output(output_path):
+        return file_path, False
+    key = organizer.source_key(source)
+    if organizer.already_converted(key):
+        return file_path, False
+    status = convert(source, output_path)
+    if status:
+        organizer.record_converted(key, output_path)
+    return file_path, status
+
+def _process_batch(organizer, jobs):
+    """Remux a batch of (entry, destination_dir) videos that are not MPEG-TS.
+
+    All clips that still need writing share a single ffmpeg run. Returns a
+    list of (file_path, status) like _process_one.
+    """
+    results = []
+    remux = []
+    for entry, destination_dir in jobs:
+        if organizer.cancelled:
+            results.append((entry.path, False))
+            continue
+        video_file, output_path = _video_job(organizer, entry, destination_dir)
+        if not video_file:
+            results.append((entry.path, None))
+            continue
+
+        if not organizer.claim_output(output_path):
+            results.append((entry.path, False))
+            continue
+
+        key = organizer.source_key(video_file)
+        if organizer.already_converted(key):
+            results.append((entry.path, False))
+        else:
+            remux.append((entry.path, key, video_file, output_path))
+
+    statuses = organizer.remux_to_m2ts([(src, dst) for _, _, src, dst in remux])
+    for (path, key, _, output_path), status in zip(remux, statuses):
+        if status:
+            organizer.record_converted(key, output_path)
+        results.append((path, status))
+    return results
 
 class MediaOrganizer:
     def __init__(self):
-        self.config = configparser.ConfigParser()
+        # Paths as last read from or written to disk, to skip redundant saves
+        self._saved_paths = None
+        # ffmpeg runs out of process, so threads are enough to keep cores busy
+        self.max_workers = max(1, (os.cpu_count() or 1) // 2)
+        # Share the cores out between the concurrent ffmpeg processes
+        self.ffmpeg_threads = max(1, (os.cpu_count() or 1) // self.max_workers)
+        self._tj = None
+        if TurboJPEG is not None:
+            try:
+                self._tj = TurboJPEG()
+            except (OSError, RuntimeError):
+                # Python bindings installed but the shared library is missing
+                pass
+        # Creation dates keyed by (inode, size, mtime) of the source file
+        self._date_cache = {}
+        # Directory listings of clip folders, keyed by directory path
+        self._stream_dir_cache = {}
+        self._stream_dir_lock = threading.Lock()
+        # Cancel token for the current process_files() run
+        self._cancel = threading.Event()
+        # Names present in each destination folder, listed once per run
+        self._existing = {}
+        self._existing_lock = threading.Lock()
+        # Dedup database, opened on the first process_files() run
+        self._dedup = None
+        self._dedup_root = None
+        self._dedup_lock = threading.Lock()
+        # Running ffmpeg processes, so cancel() can stop them
+        self._procs = set()
+        self._procs_lock = threading.Lock()
         self.load_config()
 
     def load_config(self):
         """Load previous paths from config file."""
-        if os.path.exists(CONFIG_FILE):
-            self.config.read(CONFIG_FILE)
-            self.camera_path = self.config.get('Paths', 'camera_path', fallback='')
-            self.destination_root = self.config.get('Paths', 'destination_root', fallback='')
-        else:
-            self.camera_path = ''
-            self.destination_root = ''
+        try:
+            with open(CONFIG_FILE) as configfile:
+                data = json.load(configfile)
+            self.camera_path = data.get('camera_path', '')
+            self.destination_root = data.get('destination_root', '')
+            self._saved_paths = (self.camera_path, self.destination_root)
+        except (OSError, ValueError):
+            # Missing, or left empty by install.sh: pick up paths from an old INI
+            # and leave _saved_paths unset so the next save writes the JSON file
+            data = self._load_legacy_config()
+            self.camera_path = data.get('camera_path', '')
+            self.destination_root = data.get('destination_root', '')
+
+    def _load_legacy_config(self):
+        """Read paths from the INI config written by older versions."""
+        if not os.path.exists(LEGACY_CONFIG_FILE):
+            return {}
+        import configparser
+        config = configparser.ConfigParser()
+        config.read(LEGACY_CONFIG_FILE)
+        return {
+            'camera_path': config.get('Paths', 'camera_path', fallback=''),
+            'destination_root': config.get('Paths', 'destination_root', fallback='')
+        }
 
     def save_config(self):
         """Save paths to config file."""
-        self.config['Paths'] = {
+        paths = (self.camera_path, self.destination_root)
+        if paths == self._saved_paths:
+            return
+
+        data = {
             'camera_path': self.camera_path,
             'destination_root': self.destination_root
         }
-        with open(CONFIG_FILE, 'w') as configfile:
-            self.config.write(configfile)
-
-    def get_creation_date(self, file_path):
-        """Extract creation date from file metadata."""
+        text = json.dumps(data)
         try:
-            probe = ffmpeg.probe(file_path)
-            for stream in probe['streams']:
-                if 'tags' in stream and 'creation_time' in stream['tags']:
-                    creation_time = stream['tags']['creation_time']
-                    return datetime.strptime(creation_time, '%Y-%m-%dT%H:%M:%S.%fZ').strftime('%m-%d-%Y')
-        except Exception:
-            pass
+            # Write to a temporary file and swap it in so a crash can't leave a half-written config
+            tmp_file = CONFIG_FILE + '.tmp'
+            with open(tmp_file, 'w') as configfile:
+                configfile.write(text)
+            if os.path.exists(CONFIG_FILE):
+                # Keep the permissions install.sh gave the config (a+rw)
+                os.chmod(tmp_file, os.stat(CONFIG_FILE).st_mode & 0o7777)
+            os.replace(tmp_file, CONFIG_FILE)
+        except OSError:
+            # The install directory may not be writable, or the config may belong
+            # to another user, so fall back to rewriting it in place
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            try:
+                with open(CONFIG_FILE, 'w') as configfile:
+                    configfile.write(text)
+            except OSError as e:
+                # Losing the saved paths shouldn't stop the export itself
+                print(f"Could not save config to {CONFIG_FILE}: {e}")
+                return
+        self._saved_paths = paths
+
+    def get_creation_date(self, entry):
+        """Extract creation date from file metadata, caching it per file version."""
+        stat = entry.stat()
+        key = (entry.inode(), stat.st_size, int(stat.st_mtime))
+        date_str = self._date_cache.get(key)
+        if date_str is None:
+            date_str = self._read_creation_date(entry, stat)
+            self._date_cache[key] = date_str
+        return date_str
+
+    def _date_unless_cancelled(self, entry):
+        """get_creation_date for the up-front date pass, skipped once the run is cancelled."""
+        if self._cancel.is_set():
+            return None
+        return self.get_creation_date(entry)
 
-        # Fallback to file creation time
-        return datetime.fromtimestamp(os.path.getctime(file_path)).strftime('%m-%d-%Y')
+    def _read_creation_date(self, entry, stat):
+        """Read the capture date from EXIF for images and container tags for videos."""
+        if os.path.splitext(entry.name)[1].lower() in IMG_EXT:
+            try:
+                with Image.open(entry.path) as img:
+                    exif = img.getexif()
+                # DateTimeOriginal lives in the Exif sub-IFD, DateTime in IFD0
+                taken = exif.get_ifd(0x8769).get(36867) or exif.get(306)
+                date_str = _format_date(taken) if taken else None
+                if date_str:
+                    return date_str
+            except Exception:
+                pass
+        else:
+            try:
+                # libavformat in-process only reads the container headers
+                with av.open(entry.path, metadata_errors='ignore') as container:
+                    creation_time = container.metadata.get('creation_time')
+                    for stream in container.streams:
+                        if creation_time:
+                            break
+                        creation_time = stream.metadata.get('creation_time')
+                date_str = _format_date(creation_time) if creation_time else None
+                if date_str:
+                    return date_str
+            except Exception:
+                pass
+
+        # Fallback to modification time, which the camera sets when writing the
+        # file (st_ctime on Linux is the inode change time, not creation)
+        return time.strftime('%m-%d-%Y', time.localtime(stat.st_mtime))
 
     def find_associated_video(self, cpi_file):
         """Find the associated video file for a CPI file."""
         clip_name = os.path.basename(cpi_file).replace('.CPI', '')
         clip_dir = os.path.dirname(os.path.dirname(cpi_file))
-        video_files = glob.glob(os.path.join(clip_dir, f"{clip_name}*.MTS"))
-        return video_files[0] if video_files else None
+        with self._stream_dir_lock:
+            streams = self._stream_dir_cache.get(clip_dir)
+            if streams is None:
+                # One readdir per clip folder, shared by every CPI that points at it
+                try:
+                    with os.scandir(clip_dir) as it:
+                        streams = {e.name: e.path for e in it if e.name.endswith('.MTS')}
+                except OSError:
+                    streams = {}
+                self._stream_dir_cache[clip_dir] = streams
+
+        video_file = streams.get(clip_name + '.MTS')
+        if video_file:
+            return video_file
+        for name, path in streams.items():
+            if name.startswith(clip_name):
+                return path
+        return None
+
+    @property
+    def cancelled(self):
+        """True once the current run has been cancelled."""
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Stop the current run: queued files are skipped and running ffmpeg is terminated."""
+        self._cancel.set()
+        with self._procs_lock:
+            for proc in self._procs:
+                proc.terminate()
+
+    def _open_dedup(self):
+        """Open the dedup database, leaving dedup disabled if it can't be created."""
+        try:
+            os.makedirs(os.path.dirname(DEDUP_DB), exist_ok=True)
+            db = sqlite3.connect(DEDUP_DB, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            # WAL only needs a sync at checkpoints; losing the last entries just means a re-copy
+            db.execute('PRAGMA synchronous=NORMAL')
+            # Entries are per destination root: a source exported to one drive
+            # still has to be written when exporting to another
+            db.execute('CREATE TABLE IF NOT EXISTS converted '
+                       '(key TEXT, root TEXT, dest TEXT, PRIMARY KEY (key, root))')
+            self._dedup = db
+        except (OSError, sqlite3.Error) as e:
+            print(f"Dedup cache unavailable: {e}")
+
+    def source_key(self, path):
+        """Fingerprint a source file by its size and a hash of its first 64 KiB."""
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(DEDUP_HEAD_BYTES)
+                size = os.fstat(f.fileno()).st_size
+        except OSError:
+            return None
+        return xxhash.xxh3_64(head).hexdigest() + str(size)
+
+    def already_converted(self, key):
+        """True if a source with this key was converted into the current destination
+        root before and that output still exists."""
+        if key is None or self._dedup is None:
+            return False
+        with self._dedup_lock:
+            row = self._dedup.execute('SELECT dest FROM converted WHERE key = ? AND root = ?',
+                                      (key, self._dedup_root)).fetchone()
+        return row is not None and os.path.exists(row[0])
+
+    def record_converted(self, key, output_path):
+        """Remember that the source with this key now lives at output_path."""
+        if key is None or self._dedup is None:
+            return
+        with self._dedup_lock:
+            self._dedup.execute('INSERT OR REPLACE INTO converted VALUES (?, ?, ?)',
+                                (key, self._dedup_root, output_path))
+            self._dedup.commit()
+
+    def claim_output(self, output_path):
+        """Reserve output_path for this run.
+
+        Returns False if the file was already in its destination folder when
+        the run started, or another file of this run is writing it.
+        """
+        destination_dir, name = os.path.split(output_path)
+        with self._existing_lock:
+            names = self._existing.setdefault(destination_dir, set())
+            if name in names:
+                return False
+            names.add(name)
+            return True
+
+    def _run_ffmpeg(self, args, output_files):
+        """Run ffmpeg with args, removing its outputs if it fails or is cancelled."""
+        with self._procs_lock:
+            # Checked under the lock so cancel() can't miss a process starting
+            if self._cancel.is_set():
+                raise RuntimeError("cancelled")
+            proc = subprocess.Popen(FFMPEG_ARGS + args, stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            self._procs.add(proc)
+        try:
+            _, err = proc.communicate()
+        finally:
+            with self._procs_lock:
+                self._procs.discard(proc)
+
+        if proc.returncode != 0:
+            # Don't leave a truncated file that a later run would skip as done
+            for output_file in output_files:
+                if os.path.exists(output_file):
+                    os.remove(output_file)
+            raise RuntimeError(f"ffmpeg exited with status {proc.returncode}: "
+                               f"{err.decode(errors='replace').strip()}")
+
+    def _encode_jpg_turbo(self, input_file, output_file):
+        """Re-encode an image to JPG in-process with libjpeg-turbo."""
+        with open(input_file, 'rb') as f:
+            buf = f.read()
+
+        if os.path.splitext(input_file)[1].lower() in ('.jpg', '.jpeg'):
+            pixels = self._tj.decode(buf, pixel_format=TJPF_RGB)
+        else:
+            with Image.open(io.BytesIO(buf)) as img:
+                pixels = np.asarray(img.convert('RGB'))
+
+        data = self._tj.encode(pixels, quality=JPEG_QUALITY, pixel_format=TJPF_RGB)
+        with open(output_file, 'wb') as f:
+            f.write(data)
 
     def convert_image_to_jpg(self, input_file, output_file):
         """Convert image to JPG format."""
-        if os.path.exists(output_file):
-            return False
+        if self._tj is not None:
+            try:
+                self._encode_jpg_turbo(input_file, output_file)
+                return True
+            except Exception:
+                # Fall back to ffmpeg for the rare images libjpeg-turbo rejects
+                if os.path.exists(output_file):
+                    os.remove(output_file)
 
         try:
-            stream = ffmpeg.input(input_file)
-            stream = ffmpeg.output(stream, output_file, vcodec='mjpeg', qscale=2)
-            ffmpeg.run(stream, quiet=True)
+            self._run_ffmpeg(['-i', input_file, '-vcodec', 'mjpeg', '-qscale:v', '2',
+                              '-threads', str(self.ffmpeg_threads), output_file],
+                             [output_file])
             return True
         except Exception as e:
             print(f"Error converting {input_file} to JPG: {e}")
             return False
 
-    def convert_to_m2ts(self, input_file, output_file):
-        """Convert video to M2TS format."""
-        if os.path.exists(output_file):
-            return False
-
+    def copy_to_m2ts(self, input_file, output_file):
+        """Place an MPEG-TS file at output_file without remuxing it."""
         try:
-            stream = ffmpeg.input(input_file)
-            stream = ffmpeg.output(stream, output_file, vcodec='copy', acodec='copy', f='mpegts')
-            ffmpeg.run(stream, quiet=True)
+            _fast_copy(input_file, output_file, self._cancel)
             return True
-        except Exception as e:
-            print(f"Error converting {input_file} to M2TS: {e}")
+        except InterruptedError:
+            # Cancelled mid-copy; _fast_copy already removed the partial file
+            return False
+        except OSError as e:
+            print(f"Error copying {input_file} to M2TS: {e}")
             return False
 
+    def _m2ts_output_args(self, input_index, output_file):
+        """ffmpeg arguments for one MPEG-TS output stream-copying every stream of an input.
+
+        The explicit -map keeps batched and single-clip remuxes identical.
+        """
+        return ['-map', str(input_index), '-c', 'copy', '-threads', str(self.ffmpeg_threads),
+                '-f', 'mpegts', output_file]
+
+    def remux_to_m2ts(self, jobs):
+        """Remux (input_file, output_file) pairs to M2TS, sharing one ffmpeg run.
+
+        Returns one status per job. If the combined run fails, each job is
+        retried on its own so a single bad clip doesn't fail the whole batch.
+        """
+        if len(jobs) > 1:
+            try:
+                # All inputs first, then one stream-copy output per input
+                args = []
+                for src, _ in jobs:
+                    args += ['-i', src]
+                for index, (_, dst) in enumerate(jobs):
+                    args += self._m2ts_output_args(index, dst)
+                self._run_ffmpeg(args, [dst for _, dst in jobs])
+                return [True] * len(jobs)
+            except Exception:
+                pass
+
+        statuses = []
+        for input_file, output_file in jobs:
+            if self.cancelled:
+                statuses.append(False)
+                continue
+            try:
+                self._run_ffmpeg(['-i', input_file] + self._m2ts_output_args(0, output_file),
+                                 [output_file])
+                statuses.append(True)
+            except Exception as e:
+                print(f"Error converting {input_file} to M2TS: {e}")
+                statuses.append(False)
+        return statuses
+
+    def convert_to_m2ts(self, input_file, output_file):
+        """Convert video to M2TS format."""
+        if _is_mpegts(input_file):
+            # Already a transport stream, so a remux would only rewrite the same packets
+            return self.copy_to_m2ts(input_file, output_file)
+        return self.remux_to_m2ts([(input_file, output_file)])[0]
+
+    def list_files(self, root):
+        """Return a DirEntry for every file on the camera."""
+        # readdir is I/O bound, so use more threads than cores
+        entries = _scan_entries(root, min(32, (os.cpu_count() or 1) + 4))
+        # Work through one folder and one file type at a time so readahead on
+        # the card and write-back on the destination stay sequential
+        entries.sort(key=lambda e: (os.path.dirname(e.path),
+                                    os.path.splitext(e.name)[1].lower(), e.name))
+        return entries
+
+    def process_files(self, entries, destination_root, cancel=None):
+        """Convert files in parallel, yielding (file_path, status) as each finishes.
+
+        Setting the optional cancel event (or calling cancel()) makes the
+        remaining files come back as skipped without being converted.
+        """
+        self._cancel = cancel if cancel is not None else threading.Event()
+        if self._dedup is None:
+            self._open_dedup()
+        self._dedup_root = os.path.abspath(destination_root)
+        image_files = []
+        video_files = []
+        for entry in entries:
+            ext = os.path.splitext(entry.name)[1].lower()
+            if ext in IMG_EXT:
+                image_files.append(entry)
+            elif ext in VID_EXT:
+                video_files.append(entry)
+            else:
+                yield entry.path, None
+
+        # libjpeg-turbo releases the GIL, so images get a thread per core while
+        # videos share the smaller pool sized for concurrent ffmpeg processes
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as image_executor, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as video_executor:
+            # Resolve every date up front so each date folder is created only once
+            media_files = image_files + video_files
+            dates = dict(zip((entry.path for entry in media_files),
+                             image_executor.map(self._date_unless_cancelled, media_files)))
+            self._existing = {}
+            for date_str in set(dates.values()):
+                if self._cancel.is_set():
+                    yield from ((entry.path, False) for entry in media_files)
+                    return
+                destination_dir = os.path.join(destination_root, date_str)
+                os.makedirs(destination_dir, exist_ok=True)
+                # One listing per folder stands in for an exists() check per file
+                self._existing[destination_dir] = set(os.listdir(destination_dir))
+
+            # Peek at each clip's header before any conversions are queued
+            remux_flags = list(image_executor.map(functools.partial(_needs_remux, self),
+                                                  video_files))
+
+            futures = [image_executor.submit(_process_one, self, entry,
+                                             os.path.join(destination_root, dates[entry.path]))
+                       for entry in image_files]
+
+            # Transport streams (nearly every camera clip) are copied one clip per
+            # job, so progress and load balancing stay per clip
+            remux_files = []
+            for entry, needs_remux in zip(video_files, remux_flags):
+                if needs_remux:
+                    remux_files.append(entry)
+                else:
+                    futures.append(video_executor.submit(
+                        _process_one, self, entry,
+                        os.path.join(destination_root, dates[entry.path])))
+
+            # Only the rare clips that need ffmpeg go out in batches sharing one
+            # process, small enough that every video worker gets one
+            batch_size = max(1, min(REMUX_BATCH_SIZE, -(-len(remux_files) // self.max_workers)))
+            batch_futures = set()
+            for start in range(0, len(remux_files), batch_size):
+                jobs = [(entry, os.path.join(destination_root, dates[entry.path]))
+                        for entry in remux_files[start:start + batch_size]]
+                batch_futures.add(video_executor.submit(_process_batch, self, jobs))
+            futures += batch_futures
+
+            for future in as_completed(futures):
+                if future in batch_futures:
+                    yield from future.result()
+                else:
+                    yield future.result()
+
     def process_media_files(self):
         """Process all media files."""
         # Get all files from camera
-        files = []
-        for root, _, filenames in os.walk(self.camera_path):
-            for filename in filenames:
-                files.append(os.path.join(root, filename))
+        files = self.list_files(self.camera_path)
 
         processed_count = 0
         skipped_count = 0
 
-        for file_path in tqdm(files, desc="Processing files"):
-            date_str = self.get_creation_date(file_path)
-            destination_dir = os.path.join(self.destination_root, date_str)
-            os.makedirs(destination_dir, exist_ok=True)
-
-            if file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.tiff')):
-                # Process image file - convert to JPG
-                output_filename = os.path.splitext(os.path.basename(file_path))[0] + '.jpg'
-                output_path = os.path.join(destination_dir, output_filename)
-
-                if self.convert_image_to_jpg(file_path, output_path):
-                    processed_count += 1
-                else:
-                    skipped_count += 1
-
-            elif file_path.lower().endswith(('.mts', '.cpi')):
-                # Process video file - convert to M2TS
-                output_filename = os.path.splitext(os.path.basename(file_path))[0] + '.m2ts'
-                output_path = os.path.join(destination_dir, output_filename)
-
-                if file_path.lower().endswith('.cpi'):
-                    video_file = self.find_associated_video(file_path)
-                    if video_file:
-                        if self.convert_to_m2ts(video_file, output_path):
-                            processed_count += 1
-                        else:
-                            skipped_count += 1
-                else:
-                    if self.convert_to_m2ts(file_path, output_path):
-                        processed_count += 1
-                    else:
-                        skipped_count += 1
+        results = self.process_files(files, self.destination_root)
+        for _, status in tqdm(results, total=len(files), desc="Processing files"):
+            if status is True:
+                processed_count += 1
+            elif status is False:
+                skipped_count += 1
 
         print(f"\nProcessing complete!")
         print(f"Processed {processed_count} files")